@@ -0,0 +1,181 @@
+"""On-disk cache of per-file scan results between runs."""
+
+import contextlib
+import hashlib
+import os
+import pathlib
+import sqlite3
+import sys
+from dataclasses import dataclass
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    lines INTEGER NOT NULL,
+    hash TEXT,
+    hash_algorithm TEXT
+)
+"""
+
+
+@dataclass(slots=True)
+class CachedScan:
+    """Result of scanning one file, as stored in the cache.
+
+    Attributes:
+        size: File size in bytes when it was scanned
+        mtime_ns: Modification time in nanoseconds when it was scanned
+        lines: Number of lines in the file, or -1 if it was found to be binary
+        file_hash: Hash of the file contents, if one was computed
+        hash_algorithm: Name of the algorithm used for file_hash
+    """
+
+    size: int
+    mtime_ns: int
+    lines: int
+    file_hash: str | None = None
+    hash_algorithm: str | None = None
+
+
+def default_cache_dir() -> pathlib.Path:
+    """Directory holding the cache databases ($XDG_CACHE_HOME/codecontexter).
+
+    Returns:
+        Path to the cache directory (not necessarily existing yet)
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return pathlib.Path(base) / "codecontexter"
+
+
+class MetadataCache:
+    """Line counts and hashes of files, reused while their size and mtime are unchanged.
+
+    The whole table is read into a dict when the cache is opened, so lookups from
+    the worker threads never touch SQLite. New results are collected in memory
+    and written back in a single transaction by ``save``, which also drops the
+    rows of files under the scanned directory that were not seen in the run
+    (deleted, renamed or now ignored), so the database does not keep growing.
+    """
+
+    def __init__(self, db_path: pathlib.Path):
+        self.db_path = db_path
+        self.entries: dict[str, CachedScan] = {}
+        self.updated: dict[str, CachedScan] = {}
+        self.seen: set[str] = set()
+        try:
+            # The connection's own context manager only ends the transaction
+            with contextlib.closing(sqlite3.connect(db_path)) as conn, conn:
+                conn.execute(_SCHEMA)
+                for path, size, mtime_ns, lines, file_hash, hash_algorithm in conn.execute(
+                    "SELECT path, size, mtime_ns, lines, hash, hash_algorithm FROM files"
+                ):
+                    self.entries[path] = CachedScan(
+                        size, mtime_ns, lines, file_hash, hash_algorithm
+                    )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not read cache {db_path}: {e}", file=sys.stderr)
+
+    @classmethod
+    def for_project(cls, project_root: pathlib.Path) -> "MetadataCache":
+        """Open the cache database belonging to a project root.
+
+        Args:
+            project_root: Project root directory
+
+        Returns:
+            MetadataCache backed by a file in default_cache_dir()
+        """
+        cache_dir = default_cache_dir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        key = hashlib.sha256(str(project_root).encode()).hexdigest()[:16]
+        return cls(cache_dir / f"{key}.sqlite")
+
+    def lookup(
+        self, file_path: str, stat: os.stat_result, hash_algorithm: str | None
+    ) -> CachedScan | None:
+        """Return the cached scan of a file if it is still valid.
+
+        Args:
+            file_path: Absolute path to the file
+            stat: Current stat result of the file
+            hash_algorithm: Algorithm whose hash is needed, or None if no hash is
+
+        Returns:
+            The cached scan, or None if the file changed or the hash is missing
+        """
+        self.seen.add(file_path)
+        cached = self.entries.get(file_path)
+        if cached is None or cached.size != stat.st_size or cached.mtime_ns != stat.st_mtime_ns:
+            return None
+        # Binary files are never hashed, so any entry for them will do
+        if (
+            hash_algorithm is not None
+            and cached.lines >= 0
+            and cached.hash_algorithm != hash_algorithm
+        ):
+            return None
+        return cached
+
+    def store(
+        self,
+        file_path: str,
+        stat: os.stat_result,
+        scanned: tuple[int, str | None] | None,
+        hash_algorithm: str | None,
+    ) -> None:
+        """Record the result of scan_file for a file.
+
+        Args:
+            file_path: Absolute path to the file
+            stat: Stat result the file was scanned with
+            scanned: Return value of scan_file (None for a binary file)
+            hash_algorithm: Algorithm used for the hash in scanned, if any
+        """
+        if scanned is None:
+            entry = CachedScan(stat.st_size, stat.st_mtime_ns, -1)
+        else:
+            lines, file_hash = scanned
+            entry = CachedScan(
+                stat.st_size,
+                stat.st_mtime_ns,
+                lines,
+                file_hash,
+                hash_algorithm if file_hash else None,
+            )
+        self.seen.add(file_path)
+        self.entries[file_path] = entry
+        self.updated[file_path] = entry
+
+    def save(self, scanned_dir: str | None = None) -> None:
+        """Write the results recorded since the cache was opened in one transaction.
+
+        Args:
+            scanned_dir: Directory that was scanned in full. Rows for files below
+                it that were not looked up since the cache was opened are removed.
+                Rows outside it (from runs on other parts of the project) are kept.
+        """
+        stale: list[str] = []
+        if scanned_dir is not None:
+            prefix = os.path.join(scanned_dir, "")
+            stale = [
+                path for path in self.entries if path.startswith(prefix) and path not in self.seen
+            ]
+        if not self.updated and not stale:
+            return
+        try:
+            with contextlib.closing(sqlite3.connect(self.db_path)) as conn, conn:
+                conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in stale])
+                conn.executemany(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (path, e.size, e.mtime_ns, e.lines, e.file_hash, e.hash_algorithm)
+                        for path, e in self.updated.items()
+                    ],
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write cache {self.db_path}: {e}", file=sys.stderr)
+        for path in stale:
+            del self.entries[path]
+        self.updated.clear()
@@ -2,9 +2,32 @@
 
 import argparse
 
+from codecontexter.constants import DEFAULT_MAX_FILE_BYTES, HASH_ALGORITHMS
 from codecontexter.output_generators import create_markdown
 
 
+def _positive_int(value: str) -> int:
+    """Parse an argparse value that must be an integer of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    """Parse an argparse value that must be an integer of at least 0."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value!r}") from None
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {number}")
+    return number
+
+
 def main():
     """Main entry point for the codecontexter CLI."""
     parser = argparse.ArgumentParser(
@@ -35,7 +58,36 @@ def main():
     parser.add_argument(
         "--include-hash",
         action="store_true",
-        help="Include SHA-256 hash for each file (slower).",
+        help="Include a content hash for each file (slower).",
+    )
+    parser.add_argument(
+        "--hash-algorithm",
+        choices=sorted(HASH_ALGORITHMS),
+        default="sha256",
+        help="Hash algorithm used with --include-hash (blake3 requires the blake3 package).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=None,
+        help="Number of worker threads used to process files (default: 4 per CPU, max 32).",
+    )
+
+    parser.add_argument(
+        "--max-file-bytes",
+        type=_non_negative_int,
+        default=DEFAULT_MAX_FILE_BYTES,
+        help="Do not read or embed files larger than this many bytes (0 for no limit).",
+    )
+
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help=(
+            "Reuse line counts and hashes of unchanged files from an on-disk cache "
+            "($XDG_CACHE_HOME/codecontexter)."
+        ),
     )
 
     args = parser.parse_args()
@@ -46,6 +98,10 @@ def main():
         args.verbose,
         not args.no_metadata_table,
         args.include_hash,
+        args.hash_algorithm,
+        args.jobs,
+        args.max_file_bytes,
+        args.cache,
     )
 
 
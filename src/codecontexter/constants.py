@@ -1,5 +1,9 @@
 """Configuration constants for codecontexter."""
 
+import re
+
+import pathspec
+
 # Language mapping from file extension/name to language name
 LANGUAGE_MAP: dict[str, str | None] = {
     # Python
@@ -246,6 +250,32 @@ LANGUAGE_MAP: dict[str, str | None] = {
     "swagger.yml": "yaml",
 }
 
+# LANGUAGE_MAP with lowercased keys, so lookups need a single case-insensitive probe
+LANGUAGE_MAP_LOWER: dict[str, str | None] = {k.lower(): v for k, v in LANGUAGE_MAP.items()}
+
+# Block size for streaming file reads. Large blocks keep per-call overhead low and
+# let hashlib release the GIL while it digests each block.
+READ_CHUNK_SIZE = 1 << 20
+
+# Leading bytes searched for a NUL byte to tell binary files from text, as git does
+BINARY_SNIFF_SIZE = 8192
+
+# Files larger than this are hashed from a memory map instead of block reads
+MMAP_THRESHOLD = 4 << 20
+
+# Default --max-file-bytes: larger files are listed but not read, hashed or embedded
+DEFAULT_MAX_FILE_BYTES = 1 << 20
+
+# Buffer size for the Markdown output file, so the report reaches the OS in
+# large writes rather than one per formatted fragment
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Supported hash algorithms and the labels used for them in the report
+HASH_ALGORITHMS: dict[str, str] = {
+    "sha256": "SHA-256",
+    "blake3": "BLAKE3",
+}
+
 # Patterns to always ignore during file scanning
 ALWAYS_IGNORE_PATTERNS: set[str] = {
     # Version Control
@@ -346,6 +376,63 @@ ALWAYS_IGNORE_PATTERNS: set[str] = {
     "uploads/",
 }
 
+
+def _split_ignore_patterns(
+    patterns: set[str],
+) -> tuple[frozenset[str], frozenset[str], tuple[str, ...], tuple[str, ...], set[str]]:
+    """Split ignore patterns into ones decidable from a basename and the rest.
+
+    Plain names ("node_modules/", ".DS_Store") and simple extension globs
+    ("*.pyc", "*.egg-info/") match a path purely by its last component, so they
+    can be checked with set lookups and str.endswith instead of running every
+    pattern's regex.
+
+    Args:
+        patterns: Gitignore-style patterns
+
+    Returns:
+        Tuple of (directory-only names, names matching files or directories,
+        directory-only name suffixes, name suffixes, patterns that still need
+        full gitignore matching)
+    """
+    simple_name = re.compile(r"^[A-Za-z0-9_.-]+$")
+    dirnames: set[str] = set()
+    names: set[str] = set()
+    dir_suffixes: set[str] = set()
+    suffixes: set[str] = set()
+    globs: set[str] = set()
+    for pattern in patterns:
+        dir_only = pattern.endswith("/")
+        body = pattern.rstrip("/")
+        if simple_name.match(body):
+            (dirnames if dir_only else names).add(body)
+        elif body.startswith("*.") and simple_name.match(body[2:]):
+            (dir_suffixes if dir_only else suffixes).add(body[1:])
+        else:
+            globs.add(pattern)
+    return (
+        frozenset(dirnames),
+        frozenset(names),
+        tuple(sorted(dir_suffixes)),
+        tuple(sorted(suffixes)),
+        globs,
+    )
+
+
+# ALWAYS_IGNORE_PATTERNS pre-split for the fast path during traversal
+(
+    IGNORED_DIRNAMES,
+    IGNORED_NAMES,
+    IGNORED_DIR_SUFFIXES,
+    IGNORED_SUFFIXES,
+    ALWAYS_IGNORE_GLOBS,
+) = _split_ignore_patterns(ALWAYS_IGNORE_PATTERNS)
+
+# The remaining always-ignore globs, compiled once at import and shared by every scan
+ALWAYS_IGNORE_SPEC = pathspec.PathSpec.from_lines(
+    pathspec.patterns.GitWildMatchPattern, sorted(ALWAYS_IGNORE_GLOBS)
+)
+
 # File categories for better organization
 FILE_CATEGORIES = {
     "source": {
@@ -373,3 +460,11 @@ FILE_CATEGORIES = {
     "build": {"makefile", "CMakeLists.txt", "build.gradle", "pom.xml"},
     "docs": {".md", ".rst", ".txt"},
 }
+
+# Reverse index of FILE_CATEGORIES by lowercased file name or extension. Built in
+# reverse so that an entry listed under several categories keeps the first one.
+EXT_TO_CATEGORY = {
+    entry.lower(): category
+    for category, entries in reversed(FILE_CATEGORIES.items())
+    for entry in entries
+}
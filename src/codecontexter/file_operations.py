@@ -1,20 +1,32 @@
 """File system operations and file processing utilities."""
 
+import functools
 import hashlib
+import mmap
 import os
 import pathlib
+import re
 import sys
-from datetime import datetime
 
 import pathspec
 
-from codecontexter.constants import ALWAYS_IGNORE_PATTERNS
+from codecontexter.cache import MetadataCache
+from codecontexter.constants import (
+    ALWAYS_IGNORE_SPEC,
+    BINARY_SNIFF_SIZE,
+    IGNORED_DIR_SUFFIXES,
+    IGNORED_DIRNAMES,
+    IGNORED_NAMES,
+    IGNORED_SUFFIXES,
+    MMAP_THRESHOLD,
+    READ_CHUNK_SIZE,
+)
 from codecontexter.language_detection import get_file_category, get_language_from_path
 from codecontexter.models import FileMetadata
 
 # For better user experience with progress tracking
 try:
-    import tqdm
+    from tqdm import tqdm
 except ImportError:
 
     class tqdm:  # type: ignore # noqa: N801
@@ -39,81 +51,191 @@ except ImportError:
             pass
 
 
-def count_lines(file_path: pathlib.Path) -> int:
-    """Efficiently count lines in a file.
+# BLAKE3 is optional; SHA-256 from hashlib is always available
+try:
+    import blake3
+except ImportError:
+    blake3 = None
 
-    Args:
-        file_path: Path to the file
 
-    Returns:
-        Number of lines in the file, or 0 if error
+def advise_file(fd: int, advice: str) -> None:
+    """Tell the kernel how a whole open file is going to be accessed.
+
+    The hint is advisory, so this is a no-op where posix_fadvise is unavailable
+    (Windows, macOS) and errors are ignored.
+
+    Args:
+        fd: Open file descriptor
+        advice: Name of the hint without prefix, e.g. "SEQUENTIAL" for
+            os.POSIX_FADV_SEQUENTIAL
     """
+    flag = getattr(os, f"POSIX_FADV_{advice}", None)
+    if flag is None or not hasattr(os, "posix_fadvise"):
+        return
     try:
-        with open(file_path, "rb") as f:
-            return sum(1 for _ in f)
+        os.posix_fadvise(fd, 0, 0, flag)
     except OSError:
-        return 0
+        pass
+
+
+def _new_hasher(algorithm: str):
+    """Create a hash object for the given algorithm name."""
+    if algorithm == "blake3":
+        # AUTO lets blake3 hash large blocks on several threads
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.new(algorithm)
+
 
+def scan_file(
+    file_path: str | os.PathLike[str],
+    hash_files: bool = False,
+    algorithm: str = "sha256",
+    size: int | None = None,
+    skip_binary: bool = False,
+) -> tuple[int, str | None] | None:
+    """Count lines and optionally hash a file in a single streaming pass.
 
-def get_file_hash(file_path: pathlib.Path, hash_files: bool = False) -> str | None:
-    """Get SHA-256 hash of file for verification.
+    Reading the file once for both results avoids opening it and pulling its
+    bytes through the page cache twice. Files above MMAP_THRESHOLD that are
+    hashed are memory-mapped instead, so the hasher consumes the mapped pages
+    in place and blake3 can spread the whole file across its threads.
 
     Args:
         file_path: Path to the file
         hash_files: Whether to compute hash (expensive operation)
+        algorithm: Hash algorithm to use ("sha256" or "blake3")
+        size: File size if already known (enables the memory-mapped path)
+        skip_binary: Stop and return None if a NUL byte appears in the first
+            BINARY_SNIFF_SIZE bytes, before the rest of the file is read
 
     Returns:
-        SHA-256 hash hex string if hash_files is True, None otherwise
+        Tuple of (line count, hash hex string or None), or None for a binary file
+        when skip_binary is set
+
+    Raises:
+        OSError: If the file cannot be opened or read
+        ValueError: If the file was emptied before it could be memory-mapped
     """
-    if not hash_files:
-        return None
-    try:
-        hash_sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
-    except OSError:
-        return None
+    hasher = _new_hasher(algorithm) if hash_files else None
+    lines = 0
+    last_block = b""
+    # Unbuffered: blocks are already large, so a BufferedReader only adds a copy
+    with open(file_path, "rb", buffering=0) as f:
+        # The file is read front to back once; let the kernel read ahead further
+        advise_file(f.fileno(), "SEQUENTIAL")
+        if hasher is not None and size is not None and size > MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if skip_binary and mm.find(b"\x00", 0, BINARY_SNIFF_SIZE) != -1:
+                    return None
+                hasher.update(mm)
+                # mmap has no count() before Python 3.13, so lines are still
+                # counted over block-sized slices of the mapping
+                for offset in range(0, len(mm), READ_CHUNK_SIZE):
+                    lines += mm[offset : offset + READ_CHUNK_SIZE].count(b"\n")
+                last_block = mm[-1:]
+        else:
+            for block in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+                # Only the first block is probed; last_block is still empty
+                if (
+                    skip_binary
+                    and not last_block
+                    and block.find(b"\x00", 0, BINARY_SNIFF_SIZE) != -1
+                ):
+                    return None
+                lines += block.count(b"\n")
+                if hasher is not None:
+                    hasher.update(block)
+                last_block = block
+
+    # A final line without a trailing newline still counts as a line
+    if last_block and not last_block.endswith(b"\n"):
+        lines += 1
+    return lines, hasher.hexdigest() if hasher is not None else None
 
 
 def process_file(
-    file_path: pathlib.Path, start_path: pathlib.Path, include_hash: bool = False
+    entry: os.DirEntry,
+    relative_path: str,
+    language: str,
+    include_hash: bool = False,
+    hash_algorithm: str = "sha256",
+    max_file_bytes: int | None = None,
+    cache: MetadataCache | None = None,
 ) -> FileMetadata | None:
     """Process a single file and extract metadata.
 
+    Files larger than max_file_bytes keep their stat metadata but are not read:
+    lines is 0 (shown as "n/a" and left out of line totals), no hash is computed,
+    and skipped_reason is set.
+    Files whose first block contains a NUL byte are treated as binary and dropped.
+
     Args:
-        file_path: Path to the file to process
-        start_path: Root path for calculating relative paths
-        include_hash: Whether to compute SHA-256 hash
+        entry: Directory entry of the file, as yielded by ``os.scandir``
+        relative_path: Path relative to the scan root, as built by collect_files
+        language: Language detected for the file by collect_files
+        include_hash: Whether to compute a content hash
+        hash_algorithm: Hash algorithm to use when include_hash is True
+        max_file_bytes: Size limit for reading the file (None or 0 for no limit)
+        cache: Cache of earlier scans; unchanged files are not read again
 
     Returns:
-        FileMetadata object if successful, None if file cannot be processed
+        FileMetadata object if successful, None if the file is binary or cannot
+        be processed
     """
+    # Paths stay plain strings on the hot path; a Path is only built for the result
+    file_path = entry.path
     try:
-        lang = get_language_from_path(file_path)
-        if lang is None:
-            return None
-
-        stat = file_path.stat()
+        # DirEntry caches the stat result, so this is served from the directory scan
+        # where the platform provides it instead of issuing another stat() call.
+        stat = entry.stat()
+        if max_file_bytes and stat.st_size > max_file_bytes:
+            lines, file_hash, skipped_reason = 0, None, "too_large"
+        else:
+            wanted_algorithm = hash_algorithm if include_hash else None
+            cached = cache.lookup(file_path, stat, wanted_algorithm) if cache else None
+            if cached is not None:
+                file_hash = cached.file_hash if include_hash else None
+                scanned = None if cached.lines < 0 else (cached.lines, file_hash)
+            else:
+                try:
+                    scanned = scan_file(
+                        file_path, include_hash, hash_algorithm, stat.st_size, skip_binary=True
+                    )
+                except (OSError, ValueError):
+                    # Listed without a line count or hash, as before, but not cached:
+                    # the error may be transient and the size and mtime stay the same
+                    scanned = (0, None)
+                else:
+                    if cache is not None:
+                        cache.store(file_path, stat, scanned, wanted_algorithm)
+            if scanned is None:
+                return None
+            lines, file_hash = scanned
+            skipped_reason = None
         return FileMetadata(
-            path=file_path,
-            relative_path=file_path.relative_to(start_path),
-            language=lang or "text",
+            path=pathlib.Path(file_path),
+            relative_path=relative_path,
+            language=language or "text",
             size=stat.st_size,
-            lines=count_lines(file_path),
-            modified=datetime.fromtimestamp(stat.st_mtime),
+            lines=lines,
+            modified=stat.st_mtime_ns,
             category=get_file_category(file_path),
-            file_hash=get_file_hash(file_path, include_hash),
+            file_hash=file_hash,
+            hash_algorithm=hash_algorithm if file_hash else None,
+            skipped_reason=skipped_reason,
         )
     except Exception as e:
         print(f"Warning: Error processing {file_path}: {e}", file=sys.stderr)
         return None
 
 
+@functools.lru_cache(maxsize=128)
 def find_project_root(start_dir: pathlib.Path) -> pathlib.Path:
     """Find the nearest parent directory containing .git or return start_dir.
 
+    Any .git entry counts, including the .git file of a submodule or linked
+    worktree. Results are memoized per start_dir; see clear_project_root_cache.
+
     Args:
         start_dir: Starting directory for search
 
@@ -122,7 +244,8 @@ def find_project_root(start_dir: pathlib.Path) -> pathlib.Path:
     """
     current = start_dir.resolve()
     while True:
-        if (current / ".git").is_dir():
+        # .git is a file rather than a directory in submodules and linked worktrees
+        if (current / ".git").exists():
             return current
         parent = current.parent
         if parent == current:
@@ -134,10 +257,81 @@ def find_project_root(start_dir: pathlib.Path) -> pathlib.Path:
         current = parent
 
 
-def get_combined_spec(root_dir: pathlib.Path) -> pathspec.PathSpec:
+class MergedPathSpec(pathspec.PathSpec):
+    """PathSpec that matches all of its patterns with one combined regex.
+
+    ``PathSpec.match_file`` runs every pattern's regex in turn. When no pattern
+    is a "!" negation, the path is ignored as soon as any of them matches, so
+    the regexes are joined into a single alternation and run once per path.
+    Specs with negations, where the last matching pattern decides, keep
+    pathspec's per-pattern matching.
+    """
+
+    def __init__(self, patterns):
+        super().__init__(patterns)
+        self.merged_regex = _merge_pattern_regexes(self.patterns)
+
+    def match_file(self, file: str | os.PathLike[str], separators=None) -> bool:
+        """Check whether a path matches any pattern, like ``PathSpec.match_file``."""
+        if self.merged_regex is None:
+            return super().match_file(file, separators)
+        return self.merged_regex.match(pathspec.util.normalize_file(file, separators)) is not None
+
+    def check_include(self, file: str) -> bool | None:
+        """Check a path the way ``check_file(file).include`` does.
+
+        Args:
+            file: Path relative to the spec's directory, using "/" separators
+
+        Returns:
+            True if the path is ignored, False if a negation re-includes it, or
+            None if no pattern matches
+        """
+        if self.merged_regex is None:
+            return self.check_file(file).include
+        return True if self.merged_regex.match(pathspec.util.normalize_file(file)) else None
+
+
+def _merge_pattern_regexes(patterns) -> re.Pattern[str] | None:
+    """Join the regexes of negation-free patterns into one alternation.
+
+    Args:
+        patterns: Compiled pathspec patterns
+
+    Returns:
+        Combined regex, or None if a pattern is a negation or cannot be merged
+        (non-regex patterns, or regexes compiled with flags of their own)
+    """
+    sources = []
+    for pattern in patterns:
+        if pattern.include is None:
+            # Blank lines and comments
+            continue
+        regex = getattr(pattern, "regex", None)
+        if not pattern.include or regex is None or regex.flags & ~re.UNICODE:
+            return None
+        # Each gitwildmatch regex names its directory-separator group "ps_d";
+        # a name may only appear once in a regex, and the groups are not used
+        source = regex.pattern.replace("(?P<ps_d>", "(?:")
+        if "(?P<" in source:
+            return None
+        sources.append(f"(?:{source})")
+    if not sources:
+        return None
+    return re.compile("|".join(sources))
+
+
+# The precompiled always-ignore patterns, matched with a single regex
+_ALWAYS_IGNORE_MERGED = MergedPathSpec(ALWAYS_IGNORE_SPEC.patterns)
+
+
+def _build_combined_spec(root_dir: pathlib.Path) -> MergedPathSpec:
     """Combines ALWAYS_IGNORE_PATTERNS with patterns from .gitignore files.
 
-    Loads .gitignore from project root and also checks .git/info/exclude.
+    Loads .gitignore from project root and also checks .git/info/exclude. The
+    simple always-ignore patterns are checked by name in collect_files; the rest
+    are precompiled in ALWAYS_IGNORE_SPEC. The project patterns come after them,
+    so their "!" negations win.
 
     Args:
         root_dir: Project root directory
@@ -145,14 +339,14 @@ def get_combined_spec(root_dir: pathlib.Path) -> pathspec.PathSpec:
     Returns:
         PathSpec object combining hardcoded patterns and .gitignore patterns
     """
-    all_patterns = list(ALWAYS_IGNORE_PATTERNS)
+    all_patterns: list[str] = []
 
     # Load root .gitignore
     gitignore_path = root_dir / ".gitignore"
     if gitignore_path.is_file():
         try:
             with open(gitignore_path, encoding="utf-8", errors="ignore") as f:
-                all_patterns.extend(f.readlines())
+                all_patterns.extend(f)
         except Exception as e:
             print(
                 f"Warning: Could not read .gitignore at {gitignore_path}: {e}",
@@ -164,14 +358,65 @@ def get_combined_spec(root_dir: pathlib.Path) -> pathspec.PathSpec:
     if git_exclude_path.is_file():
         try:
             with open(git_exclude_path, encoding="utf-8", errors="ignore") as f:
-                all_patterns.extend(f.readlines())
+                all_patterns.extend(f)
         except Exception as e:
             print(
                 f"Warning: Could not read .git/info/exclude: {e}",
                 file=sys.stderr,
             )
 
-    return pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, all_patterns)
+    if not all_patterns:
+        return _ALWAYS_IGNORE_MERGED
+    return _ALWAYS_IGNORE_MERGED + MergedPathSpec.from_lines(
+        pathspec.patterns.GitWildMatchPattern, all_patterns
+    )
+
+
+# get_combined_spec results per project root, with the ignore-file mtimes they were
+# built from
+_combined_spec_cache: dict[pathlib.Path, tuple[tuple[int | None, int | None], MergedPathSpec]] = {}
+
+
+def _mtime_ns(path: pathlib.Path) -> int | None:
+    """Return a file's modification time in nanoseconds, or None if it is missing."""
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_combined_spec(root_dir: pathlib.Path) -> MergedPathSpec:
+    """Return the combined ignore spec for a project root, reusing earlier results.
+
+    The spec is rebuilt only when the root .gitignore or .git/info/exclude has
+    been added, removed or modified since it was last built.
+
+    Args:
+        root_dir: Project root directory
+
+    Returns:
+        PathSpec object combining hardcoded patterns and .gitignore patterns
+    """
+    mtimes = (
+        _mtime_ns(root_dir / ".gitignore"),
+        _mtime_ns(root_dir / ".git" / "info" / "exclude"),
+    )
+    cached = _combined_spec_cache.get(root_dir)
+    if cached is not None and cached[0] == mtimes:
+        return cached[1]
+    spec = _build_combined_spec(root_dir)
+    _combined_spec_cache[root_dir] = (mtimes, spec)
+    return spec
+
+
+def clear_project_root_cache() -> None:
+    """Forget memoized project roots and ignore specs.
+
+    Needed when a .git entry is created or removed while the process runs
+    (for example between tests), which the caches cannot detect.
+    """
+    find_project_root.cache_clear()
+    _combined_spec_cache.clear()
 
 
 def load_nested_gitignore(directory: pathlib.Path) -> list[str]:
@@ -183,14 +428,69 @@ def load_nested_gitignore(directory: pathlib.Path) -> list[str]:
     Returns:
         List of pattern lines from the .gitignore file, or empty list if not found
     """
-    gitignore_path = directory / ".gitignore"
-    if gitignore_path.is_file():
-        try:
-            with open(gitignore_path, encoding="utf-8", errors="ignore") as f:
-                return f.readlines()
-        except OSError:
-            pass
-    return []
+    # A missing file or a directory named .gitignore fails the open itself, so
+    # no separate is_file() check is needed
+    try:
+        with open(directory / ".gitignore", encoding="utf-8", errors="ignore") as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+
+def is_path_ignored(
+    relative_path: str,
+    combined_spec: pathspec.PathSpec,
+    nested_specs: tuple[tuple[int, MergedPathSpec], ...] = (),
+    name_ignored: bool = False,
+) -> bool:
+    """Check a path against the base spec and any nested .gitignore specs.
+
+    Follows git's precedence: the deepest .gitignore with a matching pattern
+    (including a "!" negation) decides, and only when none of them match is the
+    project-level combined spec consulted.
+
+    Args:
+        relative_path: Path relative to the project root, using "/" separators
+            (directories end with "/")
+        combined_spec: PathSpec with the always-ignore and root .gitignore patterns
+        nested_specs: (prefix length, spec) pairs for the .gitignore files above
+            the path, outermost first; the prefix is the spec directory's
+            project-relative path
+        name_ignored: Whether the path's name matches one of the always-ignore
+            names checked by collect_files (IGNORED_NAMES and friends). Those
+            patterns come before all others, so they only decide when no other
+            pattern matches.
+
+    Returns:
+        True if the path is ignored
+    """
+    for prefix_len, spec in reversed(nested_specs):
+        include = spec.check_include(relative_path[prefix_len:])
+        if include is not None:
+            return include
+    if not name_ignored:
+        return combined_spec.match_file(relative_path)
+    return combined_spec.check_file(relative_path).include is not False
+
+
+def _has_negation(spec: pathspec.PathSpec) -> bool:
+    """Check whether a spec contains a "!" pattern that can re-include paths."""
+    return any(pattern.include is False for pattern in spec.patterns)
+
+
+def load_nested_spec(directory: pathlib.Path) -> MergedPathSpec | None:
+    """Compile the .gitignore in a directory below the project root.
+
+    Args:
+        directory: Directory to check for .gitignore
+
+    Returns:
+        PathSpec for the file's patterns, or None if there are none
+    """
+    nested_patterns = load_nested_gitignore(directory)
+    if not nested_patterns:
+        return None
+    return MergedPathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, nested_patterns)
 
 
 def collect_files(
@@ -199,9 +499,18 @@ def collect_files(
     combined_spec: pathspec.PathSpec,
     output_path: pathlib.Path,
     script_path: pathlib.Path,
-) -> list[pathlib.Path]:
+) -> list[tuple[os.DirEntry, str, str]]:
     """Efficiently collect all files to process.
 
+    The tree is traversed with ``os.scandir`` so that file type checks are answered
+    from the directory listing and the cached stat results can be reused later by
+    ``process_file``. Each nested .gitignore is compiled once, when its directory
+    is entered, and applies to that directory's subtree.
+
+    Always-ignored names (IGNORED_NAMES and friends) are rejected straight from
+    the listing, unless a "!" pattern in scope could re-include them; then they
+    are matched with full precedence by is_path_ignored.
+
     Args:
         start_path: Directory to start scanning from
         project_root: Project root for calculating relative paths
@@ -210,61 +519,115 @@ def collect_files(
         script_path: Script file path to exclude
 
     Returns:
-        List of file paths that should be processed
+        List of (directory entry, path relative to start_path, detected language)
+        tuples for the files that should be processed
     """
-    files_to_process = []
-
-    for root, dirs, files in os.walk(start_path, topdown=True):
-        root_path = pathlib.Path(root)
-
-        # Check for nested .gitignore and merge with base patterns
-        nested_patterns = load_nested_gitignore(root_path)
-        if nested_patterns:
-            # Create a combined spec with nested patterns
-            base_patterns = list(combined_spec.patterns)
-            local_spec = pathspec.PathSpec.from_lines(
-                pathspec.patterns.GitWildMatchPattern,
-                [str(p) for p in base_patterns] + nested_patterns,
-            )
-        else:
-            local_spec = combined_spec
+    files_to_process: list[tuple[os.DirEntry, str, str]] = []
+
+    # Relative paths are built by string concatenation while descending, so no
+    # per-entry relative_to() calls are needed. start_path lies inside
+    # project_root (find_project_root only walks upwards from it).
+    start_rel = start_path.relative_to(project_root).as_posix()
+    start_prefix = "" if start_rel == "." else start_rel + "/"
+    start_prefix_len = len(start_prefix)
+
+    # The files to skip are resolved once. start_path is resolved, so the paths
+    # of entries under it are already canonical and compare as plain strings;
+    # only symlinked files need resolving to see what they point at.
+    skip_files = {os.path.realpath(output_path), os.path.realpath(script_path)}
+
+    # .gitignore files between the project root and start_path still apply
+    initial_specs: tuple[tuple[int, MergedPathSpec], ...] = ()
+    initial_negations = _has_negation(combined_spec)
+    ancestor_path = project_root
+    ancestor_rel = ""
+    for part in start_prefix.split("/")[:-2]:
+        ancestor_path = ancestor_path / part
+        ancestor_rel += part + "/"
+        spec = load_nested_spec(ancestor_path)
+        if spec is not None:
+            initial_specs += ((len(ancestor_rel), spec),)
+            initial_negations = initial_negations or _has_negation(spec)
+
+    # Each pending directory carries the nested specs in scope and whether any
+    # spec in scope has a negation (which turns off the name fast path)
+    pending_dirs = [(str(start_path), start_prefix, initial_specs, initial_negations)]
+
+    while pending_dirs:
+        root_path, rel_dir, nested_specs, negations = pending_dirs.pop()
+        try:
+            with os.scandir(root_path) as it:
+                entries = list(it)
+        except OSError:
+            # Unreadable directories are skipped, matching os.walk's default behaviour
+            continue
+
+        # A nested .gitignore is stacked on top of the inherited specs for this
+        # subtree. The project root's own .gitignore is already in combined_spec.
+        if rel_dir and any(entry.name == ".gitignore" for entry in entries):
+            spec = load_nested_spec(pathlib.Path(root_path))
+            if spec is not None:
+                nested_specs = (*nested_specs, (len(rel_dir), spec))
+                negations = negations or _has_negation(spec)
+
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+
+            # Names ignored whatever their type are rejected straight from the
+            # listing, before the entry's type is even looked at
+            name_ignored = name in IGNORED_NAMES or name.endswith(IGNORED_SUFFIXES)
+            if name_ignored and not negations:
+                continue
 
-        # Prune ignored directories
-        for d in list(dirs):
-            dir_path = root_path / d
             try:
-                relative_dir = dir_path.relative_to(project_root)
-                # Add trailing slash to match directory patterns like "node_modules/"
-                relative_dir_str = str(relative_dir).replace(os.sep, "/") + "/"
-                if local_spec.match_file(relative_dir_str):
-                    dirs.remove(d)
-            except ValueError:
-                pass
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                # Like os.walk, symlinked directories are neither descended into
+                # nor reported as files
+                if entry.is_symlink():
+                    continue
 
-        for filename in files:
-            file_path = root_path / filename
+                # Refuse to enter well-known directories (node_modules, .git, ...)
+                # by name
+                if name in IGNORED_DIRNAMES or name.endswith(IGNORED_DIR_SUFFIXES):
+                    if not negations:
+                        continue
+                    name_ignored = True
+
+                # Prune directories matched by the remaining ignore patterns. The
+                # trailing slash lets directory patterns like "node_modules/" match.
+                relative_dir = rel_dir + name + "/"
+                if is_path_ignored(relative_dir, combined_spec, nested_specs, name_ignored):
+                    continue
+                subdirs.append((entry.path, relative_dir, nested_specs, negations))
+                continue
+
+            file_path = entry.path
 
             # Skip output and script
+            if file_path in skip_files:
+                continue
             try:
-                if file_path.resolve() in (
-                    output_path.resolve(),
-                    script_path.resolve(),
-                ):
+                if entry.is_symlink() and os.path.realpath(file_path) in skip_files:
                     continue
             except (OSError, ValueError):
                 pass
 
             # Check against ignore patterns (including nested .gitignore)
-            try:
-                relative_file = file_path.relative_to(project_root)
-                relative_file_str = str(relative_file).replace(os.sep, "/")
-                if local_spec.match_file(relative_file_str):
-                    continue
-            except ValueError:
-                pass
+            relative_file = rel_dir + name
+            if is_path_ignored(relative_file, combined_spec, nested_specs, name_ignored):
+                continue
 
             # Check if file type is supported
-            if get_language_from_path(file_path) is not None:
-                files_to_process.append(file_path)
+            language = get_language_from_path(file_path)
+            if language is not None:
+                files_to_process.append((entry, relative_file[start_prefix_len:], language))
+
+        # Visit subdirectories depth-first in listing order, as os.walk does
+        pending_dirs.extend(reversed(subdirs))
 
     return files_to_process
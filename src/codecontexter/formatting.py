@@ -0,0 +1,67 @@
+"""Formatting helpers for file sizes and Markdown anchors."""
+
+import re
+
+# Slug rules for generate_gfm_anchor, compiled once instead of on every call
+_ANCHOR_STRIP = re.compile(r"[^\w\s-]")
+_ANCHOR_HYPHEN = re.compile(r"[\s_]+")
+
+# The same rules as one str.translate table for ASCII text: characters the
+# regexes strip are deleted, and whitespace/underscores become NUL (itself
+# deleted from the input) so that their runs can be joined with single hyphens.
+_ANCHOR_TABLE = {
+    c: ("\0" if _ANCHOR_HYPHEN.fullmatch(chr(c)) else None)
+    for c in range(128)
+    if _ANCHOR_HYPHEN.fullmatch(chr(c)) or _ANCHOR_STRIP.fullmatch(chr(c))
+}
+
+
+def generate_gfm_anchor(heading_text: str) -> str:
+    """Generate a GitHub-Flavored Markdown anchor from heading text.
+
+    Args:
+        heading_text: The heading text (without # prefix)
+
+    Returns:
+        Anchor slug matching GFM behavior
+
+    Examples:
+        >>> generate_gfm_anchor("File: src/main.py")
+        'file-srcmainpy'
+    """
+    if heading_text.isascii():
+        # One translate pass drops special chars (backticks included) and marks
+        # whitespace/underscores; each run of marks then becomes a single hyphen
+        slug = heading_text.lower().translate(_ANCHOR_TABLE)
+        slug = "-".join(part for part in slug.split("\0") if part)
+        return slug.strip("-")
+
+    # Remove backticks and lowercase
+    slug = heading_text.replace("`", "").lower()
+    # Replace spaces and special chars with hyphens
+    slug = _ANCHOR_STRIP.sub("", slug)
+    slug = _ANCHOR_HYPHEN.sub("-", slug)
+    # Remove leading/trailing hyphens
+    slug = slug.strip("-")
+    return slug
+
+
+# Units used by format_size, each 1024 times the one before
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+
+def format_size(size_bytes: int) -> str:
+    """Format file size in human-readable format.
+
+    Args:
+        size_bytes: Size in bytes
+
+    Returns:
+        Formatted string like "1.5 MB"
+    """
+    if size_bytes < 1024:
+        return f"{size_bytes:.1f} B"
+    # Each unit is 2**10 times the previous one, so the bit length picks the unit
+    # directly; dividing by a power of two is exact, as in repeated halving
+    index = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (index * 10)):.1f} {_SIZE_UNITS[index]}"
@@ -1,15 +1,51 @@
 """Language and file category detection utilities."""
 
+import functools
+import os
 import pathlib
 
-from codecontexter.constants import FILE_CATEGORIES, LANGUAGE_MAP
+from codecontexter.constants import BINARY_SNIFF_SIZE, EXT_TO_CATEGORY, LANGUAGE_MAP_LOWER
 
 
-def get_language_from_path(file_path: pathlib.Path) -> str | None:
+def _name_and_suffix(file_path: str | os.PathLike[str]) -> tuple[str, str]:
+    """Split a path into its final component and that component's suffix.
+
+    Follows pathlib's rules (".bashrc" and "name." have no suffix) using plain
+    string operations, which are much cheaper than PurePath properties.
+    """
+    name = os.path.basename(file_path)
+    dot = name.rfind(".")
+    return name, name[dot:] if 0 < dot < len(name) - 1 else ""
+
+
+@functools.lru_cache(maxsize=8192)
+def _lookup_language(name: str, suffix: str) -> str | None:
+    """Look up the language for a file name or extension in LANGUAGE_MAP.
+
+    Only depends on the two strings, so results are cached; the same extensions
+    repeat across a whole tree.
+
+    Args:
+        name: File name
+        suffix: File extension including the leading dot, or empty string
+
+    Returns:
+        Language name string if the name or extension is known, None otherwise
+    """
+    # Check exact name first (case-insensitive)
+    language = LANGUAGE_MAP_LOWER.get(name.lower())
+    if language is not None:
+        return language
+
+    # Check by extension
+    return LANGUAGE_MAP_LOWER.get(suffix.lower())
+
+
+def get_language_from_path(file_path: str | os.PathLike[str]) -> str | None:
     """Determines the language hint from the file path based on LANGUAGE_MAP.
 
     Args:
-        file_path: Path to the file
+        file_path: Path to the file, as a string or path object
 
     Returns:
         Language name string if detected, None otherwise
@@ -20,42 +56,39 @@ def get_language_from_path(file_path: pathlib.Path) -> str | None:
         >>> get_language_from_path(Path("Dockerfile"))
         'dockerfile'
     """
-    name_lower = file_path.name.lower()
-
-    # Check exact name first (case-insensitive)
-    if name_lower in LANGUAGE_MAP:
-        return LANGUAGE_MAP[name_lower]
-
-    # Check exact name (case-sensitive) for files like Makefile
-    if file_path.name in LANGUAGE_MAP:
-        return LANGUAGE_MAP[file_path.name]
-
-    # Check by extension
-    if file_path.suffix.lower() in LANGUAGE_MAP:
-        return LANGUAGE_MAP[file_path.suffix.lower()]
+    name, suffix = _name_and_suffix(file_path)
+    language = _lookup_language(name, suffix)
+    if language is not None:
+        return language
 
     # Special handling for files in .github/workflows
-    if ".github" in file_path.parts and "workflows" in file_path.parts:
-        if file_path.suffix in {".yml", ".yaml"}:
+    if suffix in {".yml", ".yaml"}:
+        parts = pathlib.PurePath(file_path).parts
+        if ".github" in parts and "workflows" in parts:
             return "yaml"
 
-    # Include files with no extension as plain text if they appear to be text
-    if not file_path.suffix:
+    # Include files with no extension as plain text if they appear to be text.
+    # Like git and file(1), a NUL byte in the first block marks a file as binary;
+    # a raw os.read avoids setting up a buffered text stream for the sniff.
+    if not suffix:
         try:
-            with open(file_path, encoding="utf-8") as f:
-                f.read(512)
-            return "text"
-        except (OSError, UnicodeDecodeError):
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                head = os.read(fd, BINARY_SNIFF_SIZE)
+            finally:
+                os.close(fd)
+        except OSError:
             return None
+        return None if b"\x00" in head else "text"
 
     return None
 
 
-def get_file_category(file_path: pathlib.Path) -> str:
+def get_file_category(file_path: str | os.PathLike[str]) -> str:
     """Categorize file by its purpose.
 
     Args:
-        file_path: Path to the file
+        file_path: Path to the file, as a string or path object
 
     Returns:
         Category name ('source', 'config', 'docker', 'iac', 'ci_cd', 'build', 'docs', or 'other')
@@ -66,10 +99,7 @@ def get_file_category(file_path: pathlib.Path) -> str:
         >>> get_file_category(Path("config.json"))
         'config'
     """
-    name_lower = file_path.name.lower()
-    suffix_lower = file_path.suffix.lower()
-
-    for category, extensions in FILE_CATEGORIES.items():
-        if name_lower in extensions or suffix_lower in extensions:
-            return category
-    return "other"
+    name, suffix = _name_and_suffix(file_path)
+    # An exact file name is more specific than its extension, so it wins
+    # ("docker-compose.yml" is docker, not config)
+    return EXT_TO_CATEGORY.get(name.lower()) or EXT_TO_CATEGORY.get(suffix.lower()) or "other"
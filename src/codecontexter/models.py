@@ -4,27 +4,61 @@ import pathlib
 from dataclasses import dataclass
 from datetime import datetime
 
+from codecontexter.formatting import format_size, generate_gfm_anchor
 
-@dataclass
+
+@dataclass(slots=True)
 class FileMetadata:
     """Metadata for a single file.
 
     Attributes:
         path: Absolute path to the file
-        relative_path: Path relative to the scan root
+        relative_path: Path relative to the scan root, with "/" separators
         language: Detected programming language
         size: File size in bytes
-        lines: Number of lines in the file
-        modified: Last modification timestamp (local time, no timezone)
+        lines: Number of lines in the file (0 if its content was skipped)
+        modified: Last modification time in nanoseconds since the epoch (st_mtime_ns)
         category: File category (source, config, etc.)
-        file_hash: Optional SHA-256 hash of file contents
+        file_hash: Optional hash of file contents
+        hash_algorithm: Name of the algorithm used for file_hash (see HASH_ALGORITHMS)
+        skipped_reason: Why the file's content was not read ("too_large"), or None
+        size_str: Human-readable size, derived from size unless given
+        anchor: Markdown anchor of the file's section heading (see heading),
+            derived from it unless given
     """
 
     path: pathlib.Path
-    relative_path: pathlib.Path
+    relative_path: str
     language: str
     size: int
     lines: int
-    modified: datetime
+    modified: int
     category: str
     file_hash: str | None = None
+    hash_algorithm: str | None = None
+    skipped_reason: str | None = None
+    size_str: str = ""
+    anchor: str = ""
+
+    def __post_init__(self):
+        # Rendered once when the metadata is built (in the worker threads), then
+        # read by the metadata table, table of contents and file sections alike
+        if not self.size_str:
+            self.size_str = format_size(self.size)
+        if not self.anchor:
+            self.anchor = generate_gfm_anchor(self.heading)
+
+    @property
+    def heading(self) -> str:
+        """Title of the file's section, which the table of contents links to via anchor."""
+        return f"File: `{self.relative_path}`"
+
+    @property
+    def lines_str(self) -> str:
+        """Line count for display; "n/a" when the content was not read."""
+        return "n/a" if self.skipped_reason is not None else str(self.lines)
+
+    @property
+    def modified_dt(self) -> datetime:
+        """Last modification timestamp (local time, no timezone)."""
+        return datetime.fromtimestamp(self.modified / 1e9)
@@ -1,124 +1,319 @@
 """Markdown output generation utilities."""
 
+import codecs
+import contextlib
+import functools
+import io
+import os
 import pathlib
-import re
 import sys
-from collections import defaultdict
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
 from datetime import datetime
-
+from operator import attrgetter, itemgetter
+from typing import Any, BinaryIO
+
+from codecontexter.cache import MetadataCache
+from codecontexter.constants import (
+    DEFAULT_MAX_FILE_BYTES,
+    HASH_ALGORITHMS,
+    READ_CHUNK_SIZE,
+    WRITE_BUFFER_SIZE,
+)
 from codecontexter.file_operations import (
+    advise_file,
+    blake3,
     collect_files,
     find_project_root,
     get_combined_spec,
     process_file,
     tqdm,
 )
+from codecontexter.formatting import format_size, generate_gfm_anchor  # noqa: F401 (re-export)
 from codecontexter.models import FileMetadata
 
+# Fixed layout of the lines that open each file's section
+_SECTION_HEADER = "### {}\n\n**Language:** {} | **Size:** {} | **Lines:** {} | **Category:** {}\n\n"
+_HASH_LINE = "**Hash ({}):** `{}`\n\n"
 
-def generate_gfm_anchor(heading_text: str) -> str:
-    """Generate a GitHub-Flavored Markdown anchor from heading text.
+
+def generate_metadata_table(
+    files_metadata: list[FileMetadata],
+    sorted_metadata: list[FileMetadata] | None = None,
+) -> str:
+    """Generate a markdown table with file metadata.
 
     Args:
-        heading_text: The heading text (without # prefix)
+        files_metadata: List of FileMetadata objects
+        sorted_metadata: files_metadata already sorted by relative path, if available
 
     Returns:
-        Anchor slug matching GFM behavior
-
-    Examples:
-        >>> generate_gfm_anchor("File: src/main.py")
-        'file-srcmainpy'
+        Markdown-formatted table as a string
     """
-    # Remove backticks and lowercase
-    slug = heading_text.replace("`", "").lower()
-    # Replace spaces and special chars with hyphens
-    slug = re.sub(r"[^\w\s-]", "", slug)
-    slug = re.sub(r"[\s_]+", "-", slug)
-    # Remove leading/trailing hyphens
-    slug = slug.strip("-")
-    return slug
+    if sorted_metadata is None:
+        sorted_metadata = sorted(files_metadata, key=attrgetter("relative_path"))
+
+    rows = [
+        "| File | Size | Lines | Type | Category | Last Modified |\n",
+        "|------|------|-------|------|----------|---------------|\n",
+    ]
+
+    for meta in sorted_metadata:
+        # Timestamps are only converted to dates here, for the rows that show them;
+        # isoformat gives the same "YYYY-MM-DD HH:MM" without parsing a format string
+        modified_str = meta.modified_dt.isoformat(sep=" ", timespec="minutes")
+        rows.append(
+            f"| `{meta.relative_path}` | {meta.size_str} | {meta.lines_str} | "
+            f"{meta.language} | {meta.category} | {modified_str} |\n"
+        )
+
+    return "".join(rows)
 
 
-def format_size(size_bytes: int) -> str:
-    """Format file size in human-readable format.
+def generate_statistics(
+    files_metadata: list[FileMetadata],
+    total_lines: int | None = None,
+    total_size: int | None = None,
+) -> str:
+    """Generate statistics summary.
+
+    Files whose content was skipped have no line count, so line totals only
+    cover the files that were read; the summary says how many were left out.
 
     Args:
-        size_bytes: Size in bytes
+        files_metadata: List of FileMetadata objects
+        total_lines: Sum of the files' line counts, if already known
+        total_size: Sum of the files' sizes, if already known
 
     Returns:
-        Formatted string like "1.5 MB"
+        Markdown-formatted statistics section
     """
-    for unit in ["B", "KB", "MB", "GB"]:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.1f} TB"
+    total_files = len(files_metadata)
+    count_totals = total_lines is None or total_size is None
+    if count_totals:
+        total_lines = total_size = 0
+
+    # Per-category and per-language file and line counts (and the totals when
+    # the caller did not supply them), accumulated in one pass
+    omitted_files = 0
+    category_files: defaultdict[str, int] = defaultdict(int)
+    category_lines: defaultdict[str, int] = defaultdict(int)
+    language_files: defaultdict[str, int] = defaultdict(int)
+    language_lines: defaultdict[str, int] = defaultdict(int)
+    for meta in files_metadata:
+        if count_totals:
+            total_lines += meta.lines
+            total_size += meta.size
+        if meta.skipped_reason is not None:
+            omitted_files += 1
+        category_files[meta.category] += 1
+        category_lines[meta.category] += meta.lines
+        language_files[meta.language] += 1
+        language_lines[meta.language] += meta.lines
+
+    stats = [
+        "## 📊 Statistics\n\n",
+        f"- **Total Files:** {total_files}\n",
+        f"- **Total Lines of Code:** {total_lines:,}\n",
+    ]
+    if omitted_files:
+        stats.append(
+            f"  - *Excludes {omitted_files} files whose content was omitted (line counts n/a)*\n"
+        )
+    stats += [
+        f"- **Total Size:** {format_size(total_size)}\n\n",
+        "### By Category\n\n",
+    ]
+    for category, count in sorted(category_files.items(), key=itemgetter(1), reverse=True):
+        stats.append(f"- **{category}:** {count} files, {category_lines[category]:,} lines\n")
 
+    stats.append("\n### By Language\n\n")
+    for language, count in sorted(language_files.items(), key=itemgetter(1), reverse=True):
+        stats.append(f"- **{language}:** {count} files, {language_lines[language]:,} lines\n")
+
+    return "".join(stats)
 
-def generate_metadata_table(files_metadata: list[FileMetadata]) -> str:
-    """Generate a markdown table with file metadata.
+
+def _progress_throttle(total: int) -> dict[str, Any]:
+    """tqdm options that limit redraws to about 200 per bar and five per second.
+
+    A redraw per file would take the progress bar's lock and repaint the
+    terminal for every small file in large trees.
 
     Args:
-        files_metadata: List of FileMetadata objects
+        total: Number of items the bar counts
 
     Returns:
-        Markdown-formatted table as a string
+        Keyword arguments for tqdm
     """
-    table = "| File | Size | Lines | Type | Category | Last Modified |\n"
-    table += "|------|------|-------|------|----------|---------------|\n"
-
-    for meta in sorted(files_metadata, key=lambda x: str(x.relative_path)):
-        size_str = format_size(meta.size)
-        modified_str = meta.modified.strftime("%Y-%m-%d %H:%M")
-        table += (
-            f"| `{meta.relative_path}` | {size_str} | {meta.lines} | "
-            f"{meta.language} | {meta.category} | {modified_str} |\n"
-        )
+    return {"mininterval": 0.2, "miniters": max(1, total // 200)}
 
-    return table
 
+def _map_bounded(
+    executor: Executor, fn: Callable[[Any], Any], items: Iterable[Any], max_pending: int
+) -> Iterator[tuple[Any, Any]]:
+    """Run fn over items on executor with at most max_pending tasks in flight.
 
-def generate_statistics(files_metadata: list[FileMetadata]) -> str:
-    """Generate statistics summary.
+    Unlike Executor.map, tasks are submitted lazily instead of all up front, and
+    results are yielded as soon as they finish rather than in input order.
 
     Args:
-        files_metadata: List of FileMetadata objects
+        executor: Executor to run the tasks on
+        fn: Function to apply to each item
+        items: Items to process
+        max_pending: Maximum number of submitted but unfinished tasks
+
+    Yields:
+        (item, result) pairs in completion order
+    """
+    pending = {}
+    for item in items:
+        if len(pending) >= max_pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+        pending[executor.submit(fn, item)] = item
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future.result()
+
+
+def _copy_source(code_file: BinaryIO, md_file: BinaryIO) -> bool:
+    """Copy a source file into the report as UTF-8, in bounded blocks.
+
+    The result is the same as reading the file in text mode with
+    ``errors="ignore"`` (invalid bytes dropped, universal newlines) and
+    encoding it again. Blocks of plain ASCII without carriage returns, which
+    is almost all source code, need neither step and are copied as raw bytes;
+    only other blocks go through the decoder.
+
+    Args:
+        code_file: Source file opened in binary mode
+        md_file: Report opened in binary mode
 
     Returns:
-        Markdown-formatted statistics section
+        True if the copied content ends with a newline
     """
-    total_files = len(files_metadata)
-    total_lines = sum(m.lines for m in files_metadata)
-    total_size = sum(m.size for m in files_metadata)
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder("utf-8")(errors="ignore"), translate=True
+    )
+    last = b""
+    while chunk := code_file.read(READ_CHUNK_SIZE):
+        # Raw copying is only safe while the decoder holds no partial character
+        # and no "\r" that could pair with a "\n" at the start of this block
+        pending, flags = decoder.getstate()
+        if not pending and not flags & 1 and chunk.isascii() and b"\r" not in chunk:
+            data = chunk
+        else:
+            data = decoder.decode(chunk).encode()
+        if data:
+            md_file.write(data)
+            last = data
+    data = decoder.decode(b"", final=True).encode()
+    if data:
+        md_file.write(data)
+        last = data
+    return last.endswith(b"\n")
+
+
+def _open_source(meta: FileMetadata) -> BinaryIO | None:
+    """Open a file whose content goes into the report, reading it if it is small.
+
+    Runs on the prefetch thread. Files up to READ_CHUNK_SIZE are read whole and
+    returned in memory, so their open and read overlap with writing the files
+    before them; larger ones are returned open and streamed by the writer.
 
-    # Group by category
-    by_category = defaultdict(list)
-    for meta in files_metadata:
-        by_category[meta.category].append(meta)
+    Args:
+        meta: Metadata of the file
 
-    # Group by language
-    by_language = defaultdict(list)
-    for meta in files_metadata:
-        by_language[meta.language].append(meta)
+    Returns:
+        Binary file object with the content, or None if the content is omitted
+    """
+    if meta.skipped_reason is not None:
+        return None
+    code_file = open(meta.path, "rb")
+    if meta.size > READ_CHUNK_SIZE:
+        return code_file
+    with code_file:
+        data = code_file.read()
+        # This is the last read of the file; don't let its pages crowd more
+        # useful data out of the page cache
+        advise_file(code_file.fileno(), "DONTNEED")
+    return io.BytesIO(data)
+
+
+def _prefetch_sources(
+    files_metadata: Iterable[FileMetadata], depth: int = 4
+) -> Iterator[tuple[FileMetadata, Future]]:
+    """Open upcoming files on a background thread while earlier ones are written.
+
+    Args:
+        files_metadata: Files in the order they are written
+        depth: Number of files opened ahead of the one being written
+
+    Yields:
+        (metadata, future) pairs in input order; each future resolves to the
+        result of _open_source or raises its OSError
+    """
+    pending: deque[tuple[FileMetadata, Future]] = deque()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        for meta in files_metadata:
+            pending.append((meta, executor.submit(_open_source, meta)))
+            if len(pending) > depth:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+def _emit_file(
+    md_file: BinaryIO,
+    meta: FileMetadata,
+    code_file: BinaryIO | None,
+    max_file_bytes: int | None,
+) -> None:
+    """Write one file's section: heading, metadata line and fenced contents.
+
+    Kept out of the writing loop so that everything held for a file, such as
+    its buffered contents, is released when the section is done.
+
+    Args:
+        md_file: Markdown output opened in binary mode
+        meta: Metadata of the file
+        code_file: Open source file, or None if its content is omitted
+        max_file_bytes: Size limit the content was omitted for, if any
+    """
+    # Assemble the section header and hand it to the writer at once
+    section = [
+        _SECTION_HEADER.format(
+            meta.heading, meta.language, meta.size_str, meta.lines_str, meta.category
+        )
+    ]
 
-    stats = "## 📊 Statistics\n\n"
-    stats += f"- **Total Files:** {total_files}\n"
-    stats += f"- **Total Lines of Code:** {total_lines:,}\n"
-    stats += f"- **Total Size:** {format_size(total_size)}\n\n"
+    if meta.file_hash:
+        section.append(_HASH_LINE.format(HASH_ALGORITHMS[meta.hash_algorithm], meta.file_hash))
 
-    stats += "### By Category\n\n"
-    for category, metas in sorted(by_category.items(), key=lambda x: len(x[1]), reverse=True):
-        count = len(metas)
-        lines = sum(m.lines for m in metas)
-        stats += f"- **{category}:** {count} files, {lines:,} lines\n"
+    if code_file is None:
+        section.append(
+            f"*Content omitted: file is larger than {format_size(max_file_bytes)}.*\n\n---\n\n"
+        )
+        md_file.write("".join(section).encode())
+        return
 
-    stats += "\n### By Language\n\n"
-    for language, metas in sorted(by_language.items(), key=lambda x: len(x[1]), reverse=True):
-        count = len(metas)
-        lines = sum(m.lines for m in metas)
-        stats += f"- **{language}:** {count} files, {lines:,} lines\n"
+    # Write code fence with language hint for syntax highlighting
+    section.append(f"```{meta.language}\n")
+    md_file.write("".join(section).encode())
 
-    return stats
+    ends_with_newline = False
+    try:
+        ends_with_newline = _copy_source(code_file, md_file)
+    finally:
+        # Close the fence even if reading stops part way
+        md_file.write(b"```\n\n---\n\n" if ends_with_newline else b"\n```\n\n---\n\n")
+    if not isinstance(code_file, io.BytesIO):
+        # Streamed from disk: this was the last read of it
+        advise_file(code_file.fileno(), "DONTNEED")
 
 
 def create_markdown(
@@ -127,6 +322,10 @@ def create_markdown(
     verbose: bool,
     include_metadata_table: bool,
     include_hash: bool,
+    hash_algorithm: str = "sha256",
+    max_workers: int | None = None,
+    max_file_bytes: int | None = DEFAULT_MAX_FILE_BYTES,
+    use_cache: bool = False,
 ):
     """Generates the enhanced Markdown file.
 
@@ -135,7 +334,15 @@ def create_markdown(
         output_file: Path to output markdown file
         verbose: Whether to print detailed progress
         include_metadata_table: Whether to include metadata table
-        include_hash: Whether to compute SHA-256 hashes
+        include_hash: Whether to compute content hashes
+        hash_algorithm: Hash algorithm to use, one of HASH_ALGORITHMS
+            ("sha256" or "blake3")
+        max_workers: Number of worker threads used to process files
+            (None uses four per CPU core, up to 32)
+        max_file_bytes: Files above this size are listed but their content is not
+            read or embedded (None or 0 for no limit)
+        use_cache: Whether to reuse line counts and hashes of unchanged files
+            from the on-disk cache of earlier runs
     """
     start_path = pathlib.Path(target_dir).resolve()
     output_path = pathlib.Path(output_file).resolve()
@@ -149,6 +356,25 @@ def create_markdown(
         print(f"Error: Directory not found: {target_dir}", file=sys.stderr)
         sys.exit(1)
 
+    if max_file_bytes is not None and max_file_bytes < 0:
+        print(f"Error: max_file_bytes must not be negative: {max_file_bytes}", file=sys.stderr)
+        sys.exit(1)
+
+    if include_hash and hash_algorithm not in HASH_ALGORITHMS:
+        print(
+            f"Error: Unsupported hash algorithm: {hash_algorithm} "
+            f"(choose from {', '.join(sorted(HASH_ALGORITHMS))}).",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if include_hash and hash_algorithm == "blake3" and blake3 is None:
+        print(
+            "Error: BLAKE3 hashing requires the 'blake3' package (pip install blake3).",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
     project_root = find_project_root(start_path)
     combined_spec = get_combined_spec(project_root)
 
@@ -157,80 +383,118 @@ def create_markdown(
     if (project_root / ".gitignore").exists():
         print(f"✓ Using .gitignore from: {project_root / '.gitignore'}")
 
+    cache = None
+    if use_cache:
+        try:
+            cache = MetadataCache.for_project(project_root)
+            print(f"🗄 Using cache: {cache.db_path}")
+        except OSError as e:
+            print(f"Warning: Could not open cache, continuing without it: {e}", file=sys.stderr)
+
     # Collect files
     print("📑 Collecting files...")
-    file_paths = collect_files(start_path, project_root, combined_spec, output_path, script_path)
-    print(f"✓ Found {len(file_paths)} files to process")
+    file_entries = collect_files(start_path, project_root, combined_spec, output_path, script_path)
+    print(f"✓ Found {len(file_entries)} files to process")
 
     # Process files with metadata
     print("🔄 Processing files and extracting metadata...")
-    files_metadata: list[FileMetadata] = []
 
-    with tqdm(total=len(file_paths), desc="Processing", unit="file") as pbar:
-        for file_path in file_paths:
-            meta = process_file(file_path, start_path, include_hash)
+    # Read files in inode order: it approximates on-disk layout, so the first full
+    # read of each file (in process_file) seeks far less on spinning disks. Only on
+    # POSIX does the inode number come from the directory listing; on Windows each
+    # inode() call is an uncached stat and NTFS file indexes say nothing about
+    # layout, so traversal order is kept there. Results are put back in traversal
+    # order so the report does not depend on inode numbering.
+    read_order = range(len(file_entries))
+    if os.name == "posix":
+        read_order = sorted(read_order, key=lambda i: file_entries[i][0].inode())
+    results: list[FileMetadata | None] = [None] * len(file_entries)
+
+    # Stat, line counting and hashing are I/O bound or release the GIL, so threads
+    # overlap them well without having to pickle the DirEntry objects.
+    process = functools.partial(
+        process_file,
+        include_hash=include_hash,
+        hash_algorithm=hash_algorithm,
+        max_file_bytes=max_file_bytes,
+        cache=cache,
+    )
+    # Workers mostly wait on open/read/stat rather than the CPU, so oversubscribe
+    # the cores to keep more requests in flight (capped like ThreadPoolExecutor)
+    workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    # Totals are kept as results arrive, for the statistics and the final summary
+    total_lines = 0
+    total_size = 0
+    with (
+        ThreadPoolExecutor(max_workers=workers) as executor,
+        tqdm(
+            total=len(file_entries),
+            desc="Processing",
+            unit="file",
+            **_progress_throttle(len(file_entries)),
+        ) as pbar,
+    ):
+        # Keep only a couple of tasks per worker queued, so pending futures and
+        # their results do not pile up for every file in a large tree at once
+        for index, meta in _map_bounded(
+            executor, lambda i: process(*file_entries[i]), read_order, workers * 2
+        ):
+            results[index] = meta
             if meta:
-                files_metadata.append(meta)
+                total_lines += meta.lines
+                total_size += meta.size
                 if verbose:
-                    print(
-                        f"  ✓ {meta.relative_path} ({meta.lines} lines, {format_size(meta.size)})"
-                    )
+                    print(f"  ✓ {meta.relative_path} ({meta.lines_str} lines, {meta.size_str})")
             pbar.update(1)
+    if cache is not None:
+        cache.save(str(start_path))
+    files_metadata = [meta for meta in results if meta is not None]
+    # Every file listing is in path order, so sort once for all of them
+    sorted_metadata = sorted(files_metadata, key=attrgetter("relative_path"))
 
     # Write markdown
     print(f"📝 Writing to {output_path}...")
     try:
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as md_file:
+        with open(output_path, "wb", buffering=WRITE_BUFFER_SIZE) as md_file:
             # Header
-            md_file.write(f"# 📦 Code Summary: {start_path.name}\n\n")
-            md_file.write(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            md_file.write(f"**Source Directory:** `{start_path}`\n\n")
-            md_file.write("---\n\n")
+            header = [
+                f"# 📦 Code Summary: {start_path.name}\n\n",
+                f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n",
+                f"**Source Directory:** `{start_path}`\n\n",
+                "---\n\n",
+            ]
+            md_file.write("".join(header).encode())
 
             # Statistics
-            md_file.write(generate_statistics(files_metadata))
-            md_file.write("\n---\n\n")
+            md_file.write(generate_statistics(files_metadata, total_lines, total_size).encode())
+            md_file.write(b"\n---\n\n")
 
             # Metadata table
             if include_metadata_table:
-                md_file.write("## 📋 File Metadata\n\n")
-                md_file.write(generate_metadata_table(files_metadata))
-                md_file.write("\n---\n\n")
+                md_file.write("## 📋 File Metadata\n\n".encode())
+                md_file.write(generate_metadata_table(files_metadata, sorted_metadata).encode())
+                md_file.write(b"\n---\n\n")
 
             # Table of Contents
-            md_file.write("## 📑 Table of Contents\n\n")
-            for meta in sorted(files_metadata, key=lambda x: str(x.relative_path)):
-                # Generate anchor matching the actual heading format
-                heading_text = f"File: {meta.relative_path}"
-                anchor = generate_gfm_anchor(heading_text)
-                md_file.write(f"- [`{meta.relative_path}`](#{anchor})\n")
-            md_file.write("\n---\n\n")
+            toc = ["## 📑 Table of Contents\n\n"]
+            for meta in sorted_metadata:
+                toc.append(f"- [`{meta.relative_path}`](#{meta.anchor})\n")
+            toc.append("\n---\n\n")
+            md_file.write("".join(toc).encode())
 
             # File contents
-            md_file.write("## 📄 File Contents\n\n")
-            with tqdm(total=len(files_metadata), desc="Writing", unit="file") as pbar:
-                for meta in sorted(files_metadata, key=lambda x: str(x.relative_path)):
+            md_file.write("## 📄 File Contents\n\n".encode())
+            with tqdm(
+                total=len(files_metadata),
+                desc="Writing",
+                unit="file",
+                **_progress_throttle(len(files_metadata)),
+            ) as pbar:
+                for meta, source in _prefetch_sources(sorted_metadata):
                     try:
-                        with open(meta.path, encoding="utf-8", errors="ignore") as code_file:
-                            content = code_file.read()
-
-                        md_file.write(f"### File: `{meta.relative_path}`\n\n")
-                        md_file.write(f"**Language:** {meta.language} | ")
-                        md_file.write(f"**Size:** {format_size(meta.size)} | ")
-                        md_file.write(f"**Lines:** {meta.lines} | ")
-                        md_file.write(f"**Category:** {meta.category}\n\n")
-
-                        if meta.file_hash:
-                            md_file.write(f"**Hash (SHA-256):** `{meta.file_hash}`\n\n")
-
-                        # Write code fence with language hint for syntax highlighting
-                        md_file.write(f"```{meta.language}\n")
-                        md_file.write(content)
-                        if not content.endswith("\n"):
-                            md_file.write("\n")
-                        md_file.write("```\n\n")
-                        md_file.write("---\n\n")
+                        with source.result() or contextlib.nullcontext() as code_file:
+                            _emit_file(md_file, meta, code_file, max_file_bytes)
                     except (OSError, UnicodeDecodeError) as e:
                         print(
                             f"⚠ Warning: Could not read {meta.relative_path}: {e}",
@@ -240,8 +504,8 @@ def create_markdown(
                     pbar.update(1)
 
         print(f"\n✅ Success! Processed {len(files_metadata)} files")
-        print(f"📊 Total lines: {sum(m.lines for m in files_metadata):,}")
-        print(f"💾 Total size: {format_size(sum(m.size for m in files_metadata))}")
+        print(f"📊 Total lines: {total_lines:,}")
+        print(f"💾 Total size: {format_size(total_size)}")
         print(f"📄 Output: {output_path}")
 
     except OSError as e:
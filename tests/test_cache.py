@@ -0,0 +1,71 @@
+"""Tests for the on-disk metadata cache."""
+
+import os
+
+from codecontexter import file_operations
+from codecontexter.cache import MetadataCache
+from codecontexter.file_operations import process_file
+
+
+def test_scan_is_reused_until_the_file_changes(tmp_path):
+    source = tmp_path / "src" / "a.py"
+    source.parent.mkdir()
+    source.write_text("x = 1\n")
+    db_path = tmp_path / "cache.sqlite"
+
+    cache = MetadataCache(db_path)
+    cache.store(str(source), os.stat(source), (1, "abc"), "sha256")
+    cache.save()
+
+    cache = MetadataCache(db_path)
+    cached = cache.lookup(str(source), os.stat(source), "sha256")
+    assert cached is not None
+    assert (cached.lines, cached.file_hash) == (1, "abc")
+    assert cache.lookup(str(source), os.stat(source), "blake3") is None
+
+    source.write_text("x = 1\ny = 2\n")
+    assert cache.lookup(str(source), os.stat(source), "sha256") is None
+
+
+def test_save_prunes_unseen_files_below_the_scanned_directory(tmp_path):
+    scanned = tmp_path / "scanned"
+    other = tmp_path / "other"
+    scanned.mkdir()
+    other.mkdir()
+    kept, deleted, outside = scanned / "kept.py", scanned / "deleted.py", other / "b.py"
+    for path in (kept, deleted, outside):
+        path.write_text("x = 1\n")
+    db_path = tmp_path / "cache.sqlite"
+
+    cache = MetadataCache(db_path)
+    for path in (kept, deleted, outside):
+        cache.store(str(path), os.stat(path), (1, None), None)
+    cache.save()
+
+    # Second run over the scanned directory only, after deleted.py was removed
+    cache = MetadataCache(db_path)
+    assert cache.lookup(str(kept), os.stat(kept), None) is not None
+    cache.save(str(scanned))
+
+    assert set(MetadataCache(db_path).entries) == {str(kept), str(outside)}
+
+
+def test_failed_read_is_not_cached(tmp_path, monkeypatch):
+    source = tmp_path / "a.py"
+    source.write_text("x = 1\ny = 2\n")
+    cache = MetadataCache(tmp_path / "cache.sqlite")
+
+    def failing_open(*args, **kwargs):
+        raise PermissionError("denied")
+
+    # The first read fails, e.g. before a permission fix that leaves mtime alone
+    monkeypatch.setattr(file_operations, "open", failing_open, raising=False)
+    (entry,) = [e for e in os.scandir(tmp_path) if e.name == "a.py"]
+    meta = process_file(entry, "a.py", "python", cache=cache)
+    assert meta is not None and meta.lines == 0
+    assert cache.lookup(str(source), os.stat(source), None) is None
+
+    monkeypatch.undo()
+    (entry,) = [e for e in os.scandir(tmp_path) if e.name == "a.py"]
+    meta = process_file(entry, "a.py", "python", cache=cache)
+    assert meta is not None and meta.lines == 2
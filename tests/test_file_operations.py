@@ -0,0 +1,160 @@
+"""Tests for file collection and ignore handling."""
+
+import hashlib
+import os
+import pathlib
+
+import pytest
+
+from codecontexter import file_operations
+from codecontexter.constants import BINARY_SNIFF_SIZE
+from codecontexter.file_operations import collect_files, get_combined_spec, process_file
+
+
+def _make_tree(root: pathlib.Path, files: dict[str, str]) -> None:
+    """Create a project with a .git directory and the given files."""
+    (root / ".git").mkdir()
+    for relative_path, content in files.items():
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def _collect(root: pathlib.Path, start: pathlib.Path | None = None) -> list[str]:
+    """Run collect_files and return the collected relative paths, sorted."""
+    start = start or root
+    entries = collect_files(
+        start, root, get_combined_spec(root), root / "out.md", root / "script.py"
+    )
+    return sorted(relative_path for _, relative_path, _ in entries)
+
+
+def test_always_ignored_names_are_skipped(tmp_path):
+    _make_tree(
+        tmp_path,
+        {
+            "main.py": "x = 1\n",
+            "build/b.py": "x = 1\n",
+            "node_modules/n.js": "x = 1\n",
+            "a.egg-info/e.py": "x = 1\n",
+            "Gemfile.lock": "x\n",
+        },
+    )
+    assert _collect(tmp_path) == ["main.py"]
+
+
+def test_negation_re_includes_always_ignored_directory(tmp_path):
+    _make_tree(
+        tmp_path,
+        {
+            ".gitignore": "!build/\n",
+            "main.py": "x = 1\n",
+            "build/b.py": "x = 1\n",
+            "vendor/v.py": "x = 1\n",
+        },
+    )
+    assert _collect(tmp_path) == [".gitignore", "build/b.py", "main.py"]
+
+
+def test_negation_re_includes_always_ignored_file_name(tmp_path):
+    _make_tree(
+        tmp_path,
+        {
+            ".gitignore": "!Gemfile.lock\n",
+            "Gemfile.lock": "x\n",
+            "composer.lock": "x\n",
+        },
+    )
+    assert _collect(tmp_path) == [".gitignore", "Gemfile.lock"]
+
+
+def test_nested_negation_re_includes_always_ignored_directory(tmp_path):
+    _make_tree(
+        tmp_path,
+        {
+            "sub/.gitignore": "!bin/\n",
+            "sub/bin/s.py": "x = 1\n",
+            "bin/t.py": "x = 1\n",
+        },
+    )
+    assert _collect(tmp_path) == ["sub/.gitignore", "sub/bin/s.py"]
+
+
+def test_nested_gitignore_applies_to_its_subtree_only(tmp_path):
+    _make_tree(
+        tmp_path,
+        {
+            "sub/.gitignore": "*.txt\n/local.py\n",
+            "sub/a.txt": "x\n",
+            "sub/local.py": "x = 1\n",
+            "sub/deeper/local.py": "x = 1\n",
+            "b.txt": "x\n",
+        },
+    )
+    assert _collect(tmp_path) == ["b.txt", "sub/.gitignore", "sub/deeper/local.py"]
+
+
+def test_deeper_gitignore_takes_precedence(tmp_path):
+    _make_tree(
+        tmp_path,
+        {
+            ".gitignore": "*.md\n",
+            "sub/.gitignore": "!keep.md\n",
+            "sub/deeper/.gitignore": "keep.md\n",
+            "other.md": "x\n",
+            "sub/keep.md": "x\n",
+            "sub/other.md": "x\n",
+            "sub/deeper/keep.md": "x\n",
+        },
+    )
+    assert _collect(tmp_path) == [
+        ".gitignore",
+        "sub/.gitignore",
+        "sub/deeper/.gitignore",
+        "sub/keep.md",
+    ]
+
+
+def test_gitignore_above_start_directory_applies(tmp_path):
+    _make_tree(
+        tmp_path,
+        {
+            "sub/.gitignore": "*.txt\n",
+            "sub/inner/a.txt": "x\n",
+            "sub/inner/b.md": "x\n",
+        },
+    )
+    assert _collect(tmp_path, tmp_path / "sub" / "inner") == ["b.md"]
+
+
+def _process(path: pathlib.Path, include_hash: bool = False):
+    """Run process_file on a single file, through its directory entry."""
+    (entry,) = [e for e in os.scandir(path.parent) if e.name == path.name]
+    return process_file(entry, path.name, "python", include_hash=include_hash)
+
+
+@pytest.mark.parametrize("use_mmap", [False, True], ids=["blocks", "mmap"])
+def test_nul_byte_in_first_block_drops_file(tmp_path, monkeypatch, use_mmap):
+    if use_mmap:
+        # Hashed files above the threshold are memory-mapped
+        monkeypatch.setattr(file_operations, "MMAP_THRESHOLD", 0)
+    path = tmp_path / "data.py"
+    path.write_bytes(b"x = 1\n\x00" + b"y = 2\n" * 10)
+
+    assert _process(path, include_hash=use_mmap) is None
+
+
+@pytest.mark.parametrize("use_mmap", [False, True], ids=["blocks", "mmap"])
+def test_nul_byte_after_first_block_keeps_file(tmp_path, monkeypatch, use_mmap):
+    if use_mmap:
+        monkeypatch.setattr(file_operations, "MMAP_THRESHOLD", 0)
+    path = tmp_path / "data.py"
+    data = b"#" * (BINARY_SNIFF_SIZE - 1) + b"\n" + b"\x00\n"
+    path.write_bytes(data)
+
+    meta = _process(path, include_hash=use_mmap)
+
+    assert meta is not None
+    assert meta.lines == 2
+    if use_mmap:
+        assert meta.file_hash == hashlib.sha256(data).hexdigest()
@@ -0,0 +1,43 @@
+"""Tests for Markdown anchor generation."""
+
+import pytest
+
+from codecontexter.formatting import _ANCHOR_HYPHEN, _ANCHOR_STRIP, generate_gfm_anchor
+
+
+def _regex_anchor(heading_text: str) -> str:
+    """The regex slug rules that the ASCII fast path must reproduce."""
+    slug = heading_text.replace("`", "").lower()
+    slug = _ANCHOR_STRIP.sub("", slug)
+    slug = _ANCHOR_HYPHEN.sub("-", slug)
+    return slug.strip("-")
+
+
+@pytest.mark.parametrize(
+    "heading_text",
+    [
+        "File: `src/main.py`",
+        "a - b",
+        "_-_",
+        "a__b",
+        "a_ _b",
+        "`code`",
+        "a\0b",
+        "a \0 b",
+        "  leading and trailing  ",
+        "--a--",
+        "__a__",
+        "-_ a _-",
+        "tabs\tand\nnewlines\r\x0b\x0c",
+        "File: sub/we ird_name-x.py",
+        "!@#$%^&*()+=[]{}|;:'\",.<>/?~",
+        "",
+    ],
+)
+def test_ascii_fast_path_matches_regex_rules(heading_text):
+    assert heading_text.isascii()
+    assert generate_gfm_anchor(heading_text) == _regex_anchor(heading_text)
+
+
+def test_non_ascii_heading_uses_regex_rules():
+    assert generate_gfm_anchor("File: `ünïcode/файл.py`") == "file-ünïcodeфайлpy"
@@ -0,0 +1,83 @@
+"""Regression tests: MergedPathSpec must match exactly like pathspec's PathSpec.
+
+MergedPathSpec rewrites the regex sources of pathspec's compiled patterns, so
+these tests catch a pathspec release that changes how patterns are compiled.
+"""
+
+import itertools
+
+import pathspec
+import pytest
+
+from codecontexter.constants import ALWAYS_IGNORE_GLOBS
+from codecontexter.file_operations import MergedPathSpec
+
+PATTERNS = [
+    "*.log",
+    "build/",
+    "/dist",
+    "docs/**/*.tmp",
+    "**/cache/",
+    "a?c.txt",
+    "[Tt]emp*",
+    "foo/bar",
+    "*.py[cod]",
+    r"\#literal",
+    "# a comment",
+    "",
+    *sorted(ALWAYS_IGNORE_GLOBS),
+]
+
+NEGATED_PATTERNS = [*PATTERNS, "!keep.log", "!docs/", "docs/private/"]
+
+_DIRS = ["", "build/", "src/", "docs/", "docs/x/", "src/cache/", "foo/", "dist/", "deep/a/b/"]
+_NAMES = [
+    "main.py",
+    "main.pyc",
+    "app.log",
+    "keep.log",
+    "abc.txt",
+    "axc.txt",
+    "Temp1",
+    "temp.md",
+    "bar",
+    "notes.tmp",
+    "#literal",
+    "x~",
+    "npm-debug.log.1",
+    "build",
+    "dist",
+    "cache/",
+    "private/",
+]
+PATHS = [d + n for d, n in itertools.product(_DIRS, _NAMES)]
+
+
+def _specs(patterns):
+    lines = list(patterns)
+    return (
+        pathspec.PathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, lines),
+        MergedPathSpec.from_lines(pathspec.patterns.GitWildMatchPattern, lines),
+    )
+
+
+@pytest.mark.parametrize("patterns", [PATTERNS, NEGATED_PATTERNS], ids=["plain", "negated"])
+def test_match_file_agrees_with_pathspec(patterns):
+    reference, merged = _specs(patterns)
+    for path in PATHS:
+        assert merged.match_file(path) == reference.match_file(path), path
+
+
+@pytest.mark.parametrize("patterns", [PATTERNS, NEGATED_PATTERNS], ids=["plain", "negated"])
+def test_check_include_agrees_with_check_file(patterns):
+    reference, merged = _specs(patterns)
+    for path in PATHS:
+        assert merged.check_include(path) == reference.check_file(path).include, path
+
+
+def test_negation_free_patterns_are_merged():
+    # Guards against the fast path silently falling back to per-pattern matching
+    _, merged = _specs(PATTERNS)
+    assert merged.merged_regex is not None
+    _, negated = _specs(NEGATED_PATTERNS)
+    assert negated.merged_regex is None
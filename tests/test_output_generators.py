@@ -0,0 +1,86 @@
+"""Tests for Markdown report generation."""
+
+import io
+import pathlib
+
+import pytest
+
+from codecontexter import output_generators
+from codecontexter.models import FileMetadata
+from codecontexter.output_generators import (
+    create_markdown,
+    generate_metadata_table,
+    generate_statistics,
+)
+
+
+def _meta(relative_path: str, size: int, lines: int, skipped_reason: str | None = None):
+    """Build a FileMetadata for a text file without touching the file system."""
+    return FileMetadata(
+        path=pathlib.Path(relative_path),
+        relative_path=relative_path,
+        language="text",
+        size=size,
+        lines=lines,
+        modified=0,
+        category="docs",
+        skipped_reason=skipped_reason,
+    )
+
+
+def test_unsupported_hash_algorithm_is_rejected_before_writing(tmp_path):
+    (tmp_path / "main.py").write_text("x = 1\n")
+    output = tmp_path / "out.md"
+
+    with pytest.raises(SystemExit):
+        create_markdown(str(tmp_path), str(output), False, True, True, "md5")
+
+    assert not output.exists()
+
+
+def test_skipped_files_have_no_line_count():
+    files = [_meta("a.txt", 10, 3), _meta("big.txt", 5000, 0, "too_large")]
+
+    stats = generate_statistics(files)
+    table = generate_metadata_table(files)
+
+    assert "**Total Lines of Code:** 3\n" in stats
+    assert "Excludes 1 files whose content was omitted" in stats
+    assert "| `big.txt` | 4.9 KB | n/a |" in table
+    assert "| `a.txt` | 10.0 B | 3 |" in table
+
+
+def test_negative_max_file_bytes_is_rejected(tmp_path):
+    (tmp_path / "main.py").write_text("x = 1\n")
+
+    with pytest.raises(SystemExit):
+        create_markdown(
+            str(tmp_path), str(tmp_path / "out.md"), False, True, False, max_file_bytes=-1
+        )
+
+
+_SOURCES = [
+    b"",
+    b"print('hi')\n",
+    b"no trailing newline",
+    b"windows\r\nline endings\r\n",
+    b"old mac\rline endings\r",
+    b"mixed\r\n\r\rend",
+    "unicode: café ☃ \U0001f600\n".encode(),
+    b"invalid \xff\xfe bytes \xc3\n",
+    b"ascii " * 50 + "é\r\n".encode() * 20 + b"tail",
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64])
+@pytest.mark.parametrize("data", _SOURCES)
+def test_copy_source_matches_text_mode_read(monkeypatch, chunk_size, data):
+    # Small blocks put CRLF pairs and multi-byte characters across block edges
+    monkeypatch.setattr(output_generators, "READ_CHUNK_SIZE", chunk_size)
+    expected = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="ignore").read()
+    out = io.BytesIO()
+
+    ends_with_newline = output_generators._copy_source(io.BytesIO(data), out)
+
+    assert out.getvalue() == expected.encode()
+    assert ends_with_newline == expected.endswith("\n")